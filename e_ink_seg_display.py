@@ -52,33 +52,54 @@ except:  # pylint: disable=bare-except
     pass
 
 
+class _Batch:
+    """context-manager for deferred updates, see SegmentDisplay.batch()"""
+
+    def __init__(self, display):
+        self._display = display
+        self._level = 0
+
+    def __enter__(self):
+        self._level += 1
+        return self._display
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._level -= 1
+        if not self._level and exc_type is None:
+            self._display.update()
+        return False
+
+
 class SegmentDisplay:
     """driver for Waveshare 1.9 e-ink segment display"""
 
     # constants
     _ADDR_COM = 0x3C
     _ADDR_DATA = 0x3D
-    _NUMBERS = [
-        [0xBF, 0x1F],  # 0
-        [0x00, 0x1F],  # 1
-        [0xFD, 0x17],  # 2
-        [0xF5, 0x1F],  # 3
-        [0x47, 0x1F],  # 4
-        [0xF7, 0x1D],  # 5
-        [0xFF, 0x1D],  # 6
-        [0x21, 0x1F],  # 7
-        [0xFF, 0x1F],  # 8
-        [0xF7, 0x1F],  # 9
-        [0x44, 0x00],  # -
-        [0x00, 0x00],  # white
-        [0xFF, 0x00],  # E
-        [0x5C, 0x00],  # r (big digits)
-        [0x3F, 0x01],  # r (small digits)
-    ]
-    _NUM_MINUS = 10  # index int _NUMBERS
-    _NUM_WHITE = 11  # index int _NUMBERS
-    _OFFSET_TEMP = [1, 3, 11, 4]  # byte-offset for digits left to right, last
-    _OFFSET_HUM = [5, 7, 9, 8]  # is byte for radix-point
+    _NUMBERS = (  # two bytes per digit
+        b"\xBF\x1F"  # 0
+        b"\x00\x1F"  # 1
+        b"\xFD\x17"  # 2
+        b"\xF5\x1F"  # 3
+        b"\x47\x1F"  # 4
+        b"\xF7\x1D"  # 5
+        b"\xFF\x1D"  # 6
+        b"\x21\x1F"  # 7
+        b"\xFF\x1F"  # 8
+        b"\xF7\x1F"  # 9
+        b"\x44\x00"  # -
+        b"\x00\x00"  # white
+        b"\xFF\x00"  # E
+        b"\x5C\x00"  # r (big digits)
+        b"\x3F\x01"  # r (small digits)
+    )
+    _NUM_MINUS = 10  # digit-index into _NUMBERS
+    _NUM_WHITE = 11  # digit-index into _NUMBERS
+    _NUM_E = 12  # digit-index into _NUMBERS
+    _NUM_R = 13  # digit-index into _NUMBERS (big digits)
+    _NUM_R_SMALL = 14  # digit-index into _NUMBERS (small digits)
+    _OFFSET_TEMP = (1, 3, 11)  # byte-offset for digits left to right
+    _OFFSET_HUM = (5, 7, 9)  # (radix-point is in high byte of second digit)
     _POINT = 0x20
     DEG_C = 0x05
     DEG_F = 0x06
@@ -87,17 +108,51 @@ class SegmentDisplay:
     _ABOVE_99 = 0x1F
     _BT_ON = 0x08
     _POW_ON = 0x10
+    _LUT_DU_WB = b"\x82\x80\x00\xC0\x80\x80\x62"  # waveform DU_WB
+    _LUT_GC = b"\x82\x20\x00\xA0\x80\x40\x63"  # waveform GC
+    _LUT_5S = b"\x82\x28\x20\xA8\xA0\x50\x65"  # waveform 5S
+    # commands of update(), before sending the frame:
+    #   0xAC: close the sleep, 0x2B: turn on the power, 0x40: write RAM address,
+    #   0xA9: turn on the first SRAM, 0xA8: shut down the first SRAM
+    _UPDATE_START = b"\xAC\x2B\x40\xA9\xA8"
+    # after sending the frame:
+    #   0xAB: turn on the second SRAM, 0xAA: shut down the second SRAM,
+    #   0xAF: display on
+    _UPDATE_SHOW = b"\xAB\xAA\xAF"
+    # after the refresh:
+    #   0xAE: display off, 0x28: HV off, 0xAD: sleep in
+    _UPDATE_END = b"\xAE\x28\xAD"
+    _FRAME_BLACK = b"\xff" * 15
+    _FRAME_WHITE = bytes(15)
+    _BUSY_POLL = 0.01  # poll-interval of busy-pin in seconds
+    # lazily filled cache (not a constant): memoryview of the optional
+    # humidity table, built by the first instance with hum_table=True
+    _hum_table = b""
+    # frame-time by temperature-bucket:
+    #   temp < 5:  0x31 (49+1)*20ms=1000ms, temp < 10: 0x22 (34+1)*20ms=700ms,
+    #   temp < 15: 0x18 (24+1)*20ms=500ms,  temp < 20: 0x13 (19+1)*20ms=400ms,
+    #   otherwise: 0x0E (14+1)*20ms=300ms
+    _FRAME_TIME = b"\x31\x22\x18\x13\x0E"
 
     # --- constructor   --------------------------------------------------------
 
-    def __init__(self, i2c, rst_pin, busy_pin):
-        """constructor"""
-
-        self._i2c = i2c
-        self._temp = None
-        self._buffer = bytearray(15)
+    def __init__(self, i2c, rst_pin, busy_pin, hum_table=False):
+        """constructor. The display may be run on a 400 kHz bus if all devices
+        on the bus support it.
+        hum_table=True precomputes the digits of all humidity values
+        (needs 6KB of RAM, shared by all instances) to speed up set_humidity()
+        """
+
+        self._dev_com = I2CDevice(i2c, SegmentDisplay._ADDR_COM, probe=False)
+        self._dev_data = I2CDevice(i2c, SegmentDisplay._ADDR_DATA, probe=False)
+        self._temp_bucket = -1  # no frame-time programmed yet
+        self._buffer = bytearray(16)  # 15 bytes frame plus screen-byte
+        self._last_frame = bytearray(16)  # content of last update
+        self._force_refresh()
         self._fullmode = False
+        self._active_lut = None  # waveform currently loaded
         self._unit = SegmentDisplay.DEG_C
+        self._batch = _Batch(self)
 
         self._busy_pin = digitalio.DigitalInOut(busy_pin)
         self._busy_pin.direction = digitalio.Direction.INPUT
@@ -105,6 +160,9 @@ class SegmentDisplay:
         self._rst_pin.direction = digitalio.Direction.OUTPUT
         self._rst_pin.value = False
 
+        if hum_table and not SegmentDisplay._hum_table:
+            SegmentDisplay._hum_table = memoryview(self._build_hum_table())
+
     # --- initialize device   --------------------------------------------------
 
     def init(self):
@@ -113,10 +171,9 @@ class SegmentDisplay:
         self.reset()
         time.sleep(0.1)
 
-        self._send_command(0x2B)  # POWER_ON
+        self._send_commands(b"\x2B")  # POWER_ON
         time.sleep(0.01)
-        self._send_command(0xA7)  # boost
-        self._send_command(0xE0)  # TSON
+        self._send_commands(b"\xA7\xE0")  # boost, TSON
         time.sleep(0.01)
         self.update_mode(full=self._fullmode)
 
@@ -124,6 +181,9 @@ class SegmentDisplay:
 
     def reset(self):
         """reset display"""
+        self._force_refresh()
+        self._active_lut = None
+        self._temp_bucket = -1
         self._rst_pin.value = True
         time.sleep(0.2)
         self._rst_pin.value = False
@@ -136,9 +196,10 @@ class SegmentDisplay:
     def clean(self):
         """clean display"""
         self._lut_GC()
-        self.update(data=bytearray(b"\xff" * 15), black=True)
+        self._force_refresh()
+        self.update(data=SegmentDisplay._FRAME_BLACK, black=True)
         time.sleep(1.0)
-        self.update(data=bytearray(15))
+        self.update(data=SegmentDisplay._FRAME_WHITE)
         time.sleep(0.1)
         self.update_mode(full=self._fullmode)
 
@@ -147,7 +208,8 @@ class SegmentDisplay:
     def clear(self):
         """clear display"""
         self._lut_5S()
-        self.update(data=bytearray(15))
+        self._force_refresh()
+        self.update(data=SegmentDisplay._FRAME_WHITE)
         time.sleep(0.1)
         self.update_mode(full=self._fullmode)
 
@@ -166,39 +228,67 @@ class SegmentDisplay:
     # --- update display   -----------------------------------------------------
 
     def update(self, data=None, black=False):
-        """update display with given or builtin buffer, enter sleep afterwards"""
-        self._send_command(0xAC)  # Close the sleep
-        self._send_command(0x2B)  # turn on the power
-        self._send_command(0x40)  # Write RAM address
-        self._send_command(0xA9)  # Turn on the first SRAM
-        self._send_command(0xA8)  # Shut down the first SRAM
-
-        for j in range(0, 15):
-            if data is None:
-                self._send_data(self._buffer[j])
-            else:
-                self._send_data(data[j])
-
+        """update display with given (15 bytes) or builtin buffer, enter sleep
+        afterwards. The update is skipped if the content did not change since
+        the last update.
+        """
+        if data is None:
+            frame = self._buffer
+        elif len(data) == 15:
+            frame = bytearray(data)
+            frame.append(0)
+        else:
+            raise ValueError("data must have 15 bytes")
+        frame[15] = 0x03 if black else 0x00  # Write_Screen1 or Write_Screen
+        if not black and frame == self._last_frame:
+            return
+
+        # commands and data are written inline (this is the hot path)
+        # (one write per command byte)
+        dev_com = self._dev_com
+        seq = SegmentDisplay._UPDATE_START
+        with dev_com as i2c:
+            for i in range(len(seq)):
+                i2c.write(seq, start=i, end=i + 1)
+        with self._dev_data as i2c:
+            i2c.write(frame)
+        seq = SegmentDisplay._UPDATE_SHOW
+        with dev_com as i2c:
+            for i in range(len(seq)):
+                i2c.write(seq, start=i, end=i + 1)
+        self._wait_for_idle()
+        seq = SegmentDisplay._UPDATE_END
+        with dev_com as i2c:
+            for i in range(len(seq)):
+                i2c.write(seq, start=i, end=i + 1)
         if black:
-            self._send_data(0x03)  # Write_Screen1
+            self._force_refresh()
         else:
-            self._send_data(0x00)  # Write_Screen
+            self._last_frame[:] = frame
 
-        self._send_command(0xAB)  # Turn on the second SRAM
-        self._send_command(0xAA)  # Shut down the second SRAM
-        self._send_command(0xAF)  # display on
-        self._wait_for_idle()
-        self._send_command(0xAE)  # display off
-        self._send_command(0x28)  # HV OFF
-        self._send_command(0xAD)  # sleep in
+    # --- batch changes   ------------------------------------------------------
+
+    def batch(self):
+        """return a context-manager that updates the display on exit.
+
+        The setters only change the internal buffer, so this is the same as
+        calling update() after the last setter:
+
+            with display.batch():
+                display.set_temperature(t)
+                display.set_humidity(h)
+
+        Nested batches only update the display when the outermost one exits.
+        """
+        return self._batch
 
     # --- put device into sleep-mode   -----------------------------------------
 
     def sleep(self):
         """enter sleep-mode"""
-        self._send_command(0x28)  # POWER_OFF
+        self._send_commands(b"\x28")  # POWER_OFF
         self._wait_for_idle()
-        self._send_command(0xAD)  # DEEP_SLEEP
+        self._send_commands(b"\xAD")  # DEEP_SLEEP
 
     # --- set value of temperature   -------------------------------------------
 
@@ -218,6 +308,10 @@ class SegmentDisplay:
         """set value of humidity"""
         if value > 99.9 or value < 0:
             self._set_error(SegmentDisplay._OFFSET_HUM)
+        elif SegmentDisplay._hum_table:
+            # digits of humidity use the consecutive bytes 5-10
+            idx = 6 * SegmentDisplay._to_tenths(value)
+            self._buffer[5:11] = SegmentDisplay._hum_table[idx : idx + 6]
         else:
             self._set_digits(value, SegmentDisplay._OFFSET_HUM)
         self._buffer[10] |= SegmentDisplay._PER_CENT
@@ -257,72 +351,107 @@ class SegmentDisplay:
     def _set_digits(self, value, offsets):
         """set digits to given offsets in the buffer"""
 
+        buf = self._buffer
+        nums = SegmentDisplay._NUMBERS
         if value < 0:
             is_neg = True
             value *= -1
         else:
             is_neg = False
             if value > 99.9:
-                self._buffer[0] = SegmentDisplay._ABOVE_99
+                buf[0] = SegmentDisplay._ABOVE_99
                 value -= 100
 
         # convert to integer with at most 3 digits
-        # round away from zero at x.y5 (works, since value is positive)
-        val = int(round(value * 10, 1) + 0.5)
+        val = SegmentDisplay._to_tenths(value)
         # split of digits from right
         (rest, d2) = divmod(val, 10)
-        d2 = SegmentDisplay._NUMBERS[d2]
         if rest < 10:
             # e.g.: val = 5.2 -> 52 -> (5,2) with digits=[None,5,2]
-            d1 = SegmentDisplay._NUMBERS[rest]
-            d0 = (
-                SegmentDisplay._NUMBERS[SegmentDisplay._NUM_MINUS]
-                if is_neg
-                else SegmentDisplay._NUMBERS[SegmentDisplay._NUM_WHITE]
-            )
+            d1 = rest
+            d0 = SegmentDisplay._NUM_MINUS if is_neg else SegmentDisplay._NUM_WHITE
         else:
             # e.g.: val = 42.7 -> 427 -> (42,7) -> (4,2)+7  with digits=[4,2,7]
             (d0, d1) = divmod(rest, 10)
-            d1 = SegmentDisplay._NUMBERS[d1]
-            d0 = SegmentDisplay._NUMBERS[d0]
             if is_neg:
                 # set leftmost minus
-                self._buffer[0] = SegmentDisplay._BELOW_10
+                buf[0] = SegmentDisplay._BELOW_10
 
         # update buffer
-        for i, d in enumerate([d0, d1, d2]):
-            self._buffer[offsets[i] : offsets[i] + 2] = bytes(d)
-        # add radix-point
-        self._buffer[offsets[3]] |= SegmentDisplay._POINT
+        o = offsets[0]
+        buf[o : o + 2] = nums[2 * d0 : 2 * d0 + 2]
+        # second digit: radix-point is in the high byte
+        o = offsets[1]
+        buf[o] = nums[2 * d1]
+        buf[o + 1] = nums[2 * d1 + 1] | SegmentDisplay._POINT
+        o = offsets[2]
+        buf[o : o + 2] = nums[2 * d2 : 2 * d2 + 2]
+
+    # --- convert to tenths   --------------------------------------------------
+
+    @staticmethod
+    def _to_tenths(value):
+        """round positive value to tenths and return them as integer"""
+
+        # round away from zero from x.y45 on (works, since value is positive).
+        # CircuitPython floats only have 22 mantissa bits, e.g. 8.95*10 is
+        # 89.49997, and the float spacing near 2000 is about 5e-4. The offset
+        # of 0.55 is well above that error, so every x.y5 value rounds up.
+        return int(value * 10 + 0.55)
+
+    # --- precompute humidity digits   -----------------------------------------
+
+    def _build_hum_table(self):
+        """create table with buffer-bytes 5-10 for humidity 0.0-99.9"""
+
+        table = bytearray(6000)
+        for val in range(1000):
+            self._set_digits(val / 10, SegmentDisplay._OFFSET_HUM)
+            table[6 * val : 6 * val + 6] = self._buffer[5:11]
+        self._buffer[5:11] = bytes(6)
+        return table
 
     # --- set error   ----------------------------------------------------------
 
     def _set_error(self, offsets):
         """set error to given offsets in the buffer"""
 
-        for i, d in enumerate(SegmentDisplay._NUMBERS[-3:]):
-            self._buffer[offsets[i] : offsets[i] + 2] = bytes(d)
-
-    # --- send command to device   ---------------------------------------------
-
-    def _send_command(self, value):
-        """send a command to the device"""
-        self._write_byte(SegmentDisplay._ADDR_COM, value)
-        time.sleep(0.001)
-
-    # --- send data to device   ------------------------------------------------
-
-    def _send_data(self, value):
-        """send data to the device"""
-        self._write_byte(SegmentDisplay._ADDR_DATA, value)
-        time.sleep(0.001)
+        buf = self._buffer
+        nums = SegmentDisplay._NUMBERS
+        d = 2 * SegmentDisplay._NUM_E
+        o = offsets[0]
+        buf[o : o + 2] = nums[d : d + 2]
+        d = 2 * SegmentDisplay._NUM_R
+        o = offsets[1]
+        buf[o : o + 2] = nums[d : d + 2]
+        d = 2 * SegmentDisplay._NUM_R_SMALL
+        o = offsets[2]
+        buf[o : o + 2] = nums[d : d + 2]
+
+    # --- send commands to device   --------------------------------------------
+
+    def _send_commands(self, seq, start=0, end=None):
+        """send commands seq[start:end] (bytes) to the device"""
+        if end is None:
+            end = len(seq)
+        with self._dev_com as i2c:
+            for i in range(start, end):
+                i2c.write(seq, start=i, end=i + 1)  # one write per command
+
+    # --- invalidate content of last update   ----------------------------------
+
+    def _force_refresh(self):
+        """force a refresh on the next update"""
+        self._last_frame[15] = 0xFF  # screen-byte is never 0xFF
 
     # --- wait for device   ----------------------------------------------------
 
     def _wait_for_idle(self):
         """wait for device to be ready"""
+        # refresh takes 300ms-1000ms: poll with coarse granularity
+        time.sleep(SegmentDisplay._BUSY_POLL)
         while not self._busy_pin.value:  # busy is low
-            time.sleep(0.001)
+            time.sleep(SegmentDisplay._BUSY_POLL)
         time.sleep(0.01)
 
     # --- waveform DU_WB   -----------------------------------------------------
@@ -330,91 +459,62 @@ class SegmentDisplay:
     def _lut_DU_WB(self):
         # DU waveform white extinction diagram + black out diagram
         # Bureau of brush waveform
-        self._send_command(0x82)
-        self._send_command(0x80)
-        self._send_command(0x00)
-        self._send_command(0xC0)
-        self._send_command(0x80)
-        self._send_command(0x80)
-        self._send_command(0x62)
+        self._set_lut(SegmentDisplay._LUT_DU_WB)
 
     # --- waveform DU_WB   -----------------------------------------------------
 
     def _lut_GC(self):
         # GC waveform
         # The brush waveform
-        self._send_command(0x82)
-        self._send_command(0x20)
-        self._send_command(0x00)
-        self._send_command(0xA0)
-        self._send_command(0x80)
-        self._send_command(0x40)
-        self._send_command(0x63)
+        self._set_lut(SegmentDisplay._LUT_GC)
 
     # --- waveform DU_WB   -----------------------------------------------------
 
     def _lut_5S(self):
         # 5 waveform  better ghosting
         # Boot waveform
-        self._send_command(0x82)
-        self._send_command(0x28)
-        self._send_command(0x20)
-        self._send_command(0xA8)
-        self._send_command(0xA0)
-        self._send_command(0x50)
-        self._send_command(0x65)
+        self._set_lut(SegmentDisplay._LUT_5S)
+
+    # --- load waveform   ------------------------------------------------------
+
+    def _set_lut(self, lut):
+        """load waveform, unless it is already active"""
+        if lut is self._active_lut:
+            return
+        self._send_commands(lut)
+        self._active_lut = lut
+        self._force_refresh()  # new waveform
 
     # --- adjust configuration for temperature   -------------------------------
 
     def _adjust_temperature(self, temp):
         """adjust frame-time for temperature"""
 
-        if self._temp is not None:
-            # check if update is necessary
-            if (  # pylint: disable=too-many-boolean-expressions
-                self._temp < 5
-                and temp < 5
-                or self._temp < 10
-                and temp < 10
-                or self._temp < 15
-                and temp < 15
-                or self._temp < 20
-                and temp < 20
-                or self._temp >= 20
-                and temp >= 20
-            ):
-                return
-            self._temp = temp
-        else:
-            self._temp = temp
+        bucket = SegmentDisplay._temp_bucket_of(temp)
+        if bucket == self._temp_bucket:
+            return  # frame-time is already correct
+        self._temp_bucket = bucket
 
-        if self._temp < 10:
-            self._send_command(0x7E)
-            self._send_command(0x81)
-            self._send_command(0xB4)
+        if bucket < 2:  # temp < 10
+            self._send_commands(b"\x7E\x81\xB4")
         else:
-            self._send_command(0x7B)
-            self._send_command(0x81)
-            self._send_command(0xB4)
+            self._send_commands(b"\x7B\x81\xB4")
 
         self._wait_for_idle()
-        self._send_command(0xE7)  # Set default frame time
-
-        # Set default frame time
-        if self._temp < 5:
-            self._send_command(0x31)  # 0x31  (49+1)*20ms=1000ms
-        elif self._temp < 10:
-            self._send_command(0x22)  # 0x22  (34+1)*20ms=700ms
-        elif self._temp < 15:
-            self._send_command(0x18)  # 0x18  (24+1)*20ms=500ms
-        elif self._temp < 20:
-            self._send_command(0x13)  # 0x13  (19+1)*20ms=400ms
-        else:
-            self._send_command(0x0E)  # 0x0e  (14+1)*20ms=300ms
-
-    # --- low-level I2C-interface   --------------------------------------------
-
-    def _write_byte(self, addr, value):
-        """write a single byte to the given i2c-addr"""
-        with I2CDevice(self._i2c, addr) as i2c:
-            i2c.write(bytes([value]))
+        self._send_commands(b"\xE7")  # Set default frame time
+        self._send_commands(SegmentDisplay._FRAME_TIME, bucket, bucket + 1)
+
+    # --- map temperature to frame-time bucket   -------------------------------
+
+    @staticmethod
+    def _temp_bucket_of(temp):
+        """return index into _FRAME_TIME for the given temperature"""
+        if temp < 5:
+            return 0
+        if temp < 10:
+            return 1
+        if temp < 15:
+            return 2
+        if temp < 20:
+            return 3
+        return 4
@@ -19,6 +19,9 @@ from e_ink_seg_display import SegmentDisplay
 
 # config (Pico)
 i2c = board.STEMMA_I2C()
+# faster updates: the display may be run on a 400 kHz bus if all devices
+# support it (needs "import busio"):
+# i2c = busio.I2C(board.SCL, board.SDA, frequency=400_000)
 PIN_RST = board.GP16
 PIN_BUSY = board.GP17
 
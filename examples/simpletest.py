@@ -15,6 +15,9 @@ import adafruit_ahtx0
 
 # config (Pico)
 i2c = board.STEMMA_I2C()
+# faster updates: the display may be run on a 400 kHz bus if all devices
+# support it (needs "import busio"):
+# i2c = busio.I2C(board.SCL, board.SDA, frequency=400_000)
 PIN_RST = board.GP16
 PIN_BUSY = board.GP17
 INTERVAL = 20
@@ -31,7 +34,7 @@ aht20 = adafruit_ahtx0.AHTx0(i2c)
 while True:
     t, h = aht20.temperature, aht20.relative_humidity
     print(f"{t=}, {h=}")
-    display.set_temperature(t)
-    display.set_humidity(h)
-    display.update()
+    with display.batch():
+        display.set_temperature(t)
+        display.set_humidity(h)
     time.sleep(INTERVAL)